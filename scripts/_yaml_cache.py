@@ -0,0 +1,89 @@
+# scripts/_yaml_cache.py
+"""Parse YAML once, reuse the result until the file changes.
+
+The parsed payload is pickled next to the source (``<path>.cache.pkl``) and
+keyed on ``(st_mtime_ns, st_size)``, so an unchanged papers.yaml is never
+re-parsed across script runs.
+
+``load_mirrored`` goes one step further and reads the JSON mirror written by
+scripts/yaml_to_json.py (``data/papers.json``) whenever it was converted from
+the current papers.yaml (same ``(st_mtime_ns, st_size)`` as recorded in it).
+
+``SafeLoader`` is the libyaml-backed loader when PyYAML was built with it; set
+REQUIRE_LIBYAML=1 to fail fast on an install that silently uses the pure-Python one.
+"""
+import json
+import os
+import pickle
+from typing import Any
+
+import yaml
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+if os.environ.get("REQUIRE_LIBYAML") == "1" and not yaml.__with_libyaml__:
+    raise RuntimeError("PyYAML is running without libyaml (REQUIRE_LIBYAML=1); install libyaml for perf")
+
+
+def source_key(path):
+    # type: (Any) -> list
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]  # a list so it round-trips through JSON unchanged
+
+
+def load_cached(path):
+    # type: (Any) -> Any
+    path = os.fspath(path)
+    key = source_key(path)
+    cache_path = path + ".cache.pkl"
+
+    try:
+        with open(cache_path, "rb") as f:
+            cached = pickle.load(f)
+        if cached.get("key") == key:
+            return cached["payload"]
+    except Exception:
+        pass  # missing or unreadable cache -> re-parse below
+
+    with open(path, "r", encoding="utf-8") as f:
+        payload = yaml.load(f, Loader=SafeLoader)
+
+    tmp = cache_path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump({"key": key, "payload": payload}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass  # read-only checkout: caching is best-effort
+
+    return payload
+
+
+def mirror_path(path):
+    # type: (Any) -> str
+    # data/papers.yaml -> data/papers.json
+    return os.path.splitext(os.fspath(path))[0] + ".json"
+
+
+def load_mirrored(path):
+    # type: (Any) -> Any
+    path = os.fspath(path)
+    try:
+        with open(mirror_path(path), "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return load_cached(path)
+
+    mirror = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    if not isinstance(mirror, dict) or mirror.get("source") != source_key(path):
+        # papers.yaml changed since the last conversion (edited, restored, checked out)
+        return load_cached(path)
+    return mirror["payload"]
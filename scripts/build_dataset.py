@@ -1,12 +1,31 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+from functools import lru_cache
 from pathlib import Path
-import yaml
 import subprocess
 import sys
 
+from _yaml_cache import load_mirrored
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import validate_papers
+except ImportError:
+    validate_papers = None
+
 
 def infer_publication_status(p: dict) -> str | None:
     """Infer publication_status if missing.
@@ -15,8 +34,12 @@ def infer_publication_status(p: dict) -> str | None:
     """
     if p.get("publication_status"):
         return None  # keep user-provided
+    return _decide_publication_status(str(p.get("venue", "")).strip().lower())
+
 
-    venue = str(p.get("venue", "")).strip().lower()
+@lru_cache(maxsize=64)
+def _decide_publication_status(venue: str) -> str | None:
+    # venues repeat heavily (NeurIPS, CVPR, arXiv, ...), so memoize per normalized venue
     if venue == "arxiv":
         return "canonical_preprint"
     if venue:
@@ -24,68 +47,140 @@ def infer_publication_status(p: dict) -> str | None:
     return None
 
 
+def load_citations(path: Path, wanted: set) -> tuple[dict, dict]:
+    """Return (meta, {paper_id: record}) from citations.json.
+    With ijson installed, records for ids not in `wanted` are skipped
+    while streaming instead of being materialized.
+    """
+    if ijson is None:
+        if orjson is not None:
+            raw = orjson.loads(path.read_bytes()) or {}
+        else:
+            with path.open("r", encoding="utf-8") as f:
+                raw = json.load(f) or {}
+        return raw.get("meta", {}) or {}, raw.get("papers", {}) or {}
+
+    with path.open("rb") as f:
+        meta = next(ijson.items(f, "meta", use_float=True), None) or {}
+
+    citations = {}
+    with path.open("rb") as f:
+        for pid, record in ijson.kvitems(f, "papers", use_float=True):
+            if pid in wanted:
+                citations[pid] = record
+    return meta, citations
+
+
+def inputs_digest(*paths: Path) -> str:
+    """BLAKE2b over the raw bytes of every input (missing files hash as empty)."""
+    h = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        if path.exists():
+            with path.open("rb") as f:
+                for chunk in iter(lambda: f.read(1 << 16), b""):
+                    h.update(chunk)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _enrich_one(p: dict, citations: dict) -> dict:
+    # Infer publication_status (so UI doesn't say "No link" for peer-reviewed venues)
+    inferred = infer_publication_status(p)
+    if inferred:
+        p["publication_status"] = inferred
+
+    # Merge in citations from citations.json (authoritative for counts)
+    cid = p.get("id")
+    if not cid:
+        return p
+
+    c = citations.get(cid)
+    if c and "citations" in c:
+        p["citations"] = {
+            "count": int(c["citations"]),
+            "last_checked_utc": c.get("last_checked_utc"),
+            "source": c.get("source_used"),
+        }
+
+        # Keep scholar links in a consistent location
+        p.setdefault("scholar", {})
+
+        # Prefer Google Scholar link if available
+        if c.get("scholar_url"):
+            p["scholar"]["scholar_url"] = c["scholar_url"]
+
+        # Otherwise fall back to Semantic Scholar if that's what we used
+        elif c.get("semantic_scholar_url"):
+            p["scholar"]["scholar_url"] = c["semantic_scholar_url"]
+
+    return p
+
+
 def main() -> None:
     papers_path = Path("../data/papers.yaml")
     citations_path = Path("../data/citations.json")
     out_dir = Path("../site/public/data")
     out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / "papers.json"
+    hash_path = out_dir / ".build_hash"
+
+    # Skip the whole build when papers.yaml, citations.json and the code that loads,
+    # validates and builds them (this script, validate_papers, _yaml_cache) are unchanged
+    here = Path(__file__).resolve()
+    digest = inputs_digest(
+        papers_path,
+        citations_path,
+        here,
+        here.with_name("validate_papers.py"),
+        here.with_name("_yaml_cache.py"),
+    )
+    if out_path.exists() and hash_path.exists() and hash_path.read_text().strip() == digest:
+        # inputs may have been touched without changing (editor save, branch switch):
+        # bump the output mtime so doctor's papers.json-vs-papers.yaml check agrees
+        os.utime(out_path)
+        print(f"{out_path} is up to date (inputs unchanged)")
+        return
+
+    data = load_mirrored(papers_path) or {}
+
+    # Validate before building (in-process: no second interpreter or YAML parse).
+    # Runs on the data as loaded, before enrichment below mutates it.
+    if validate_papers is not None:
+        rc = validate_papers.main(data=data)
+        if rc != 0:
+            raise SystemExit(rc)
+    else:
+        validator = Path(__file__).resolve().parent / "validate_papers.py"
+        if validator.exists():
+            subprocess.run([sys.executable, str(validator)], check=True)
 
-    with papers_path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f) or {}
+    papers = data.get("papers", []) or []
 
     citations = {}
     meta = {}
 
-    if citations_path.exists():
-        with citations_path.open("r", encoding="utf-8") as f:
-            raw = json.load(f) or {}
-            meta = raw.get("meta", {}) or {}
-            citations = raw.get("papers", {}) or {}
-
-    papers = data.get("papers", []) or []
-
-    for p in papers:
-        # Infer publication_status (so UI doesn't say "No link" for peer-reviewed venues)
-        inferred = infer_publication_status(p)
-        if inferred:
-            p["publication_status"] = inferred
-
-        # Merge in citations from citations.json (authoritative for counts)
-        cid = p.get("id")
-        if not cid:
-            continue
-
-        c = citations.get(cid)
-        if c and "citations" in c:
-            p["citations"] = {
-                "count": int(c["citations"]),
-                "last_checked_utc": c.get("last_checked_utc"),
-                "source": c.get("source_used"),
-            }
+    try:
+        st = citations_path.stat()
+    except FileNotFoundError:
+        st = None
+    # an empty file or "{}" carries no citations: skip parsing entirely
+    if st is not None and st.st_size > 2:
+        meta, citations = load_citations(citations_path, {p.get("id") for p in papers})
 
-            # Keep scholar links in a consistent location
-            p.setdefault("scholar", {})
-
-            # Prefer Google Scholar link if available
-            if c.get("scholar_url"):
-                p["scholar"]["scholar_url"] = c["scholar_url"]
-
-            # Otherwise fall back to Semantic Scholar if that's what we used
-            elif c.get("semantic_scholar_url"):
-                p["scholar"]["scholar_url"] = c["semantic_scholar_url"]
+    papers = [_enrich_one(p, citations) for p in papers]
 
     data["papers"] = papers
     data["citations_meta"] = meta
 
-
-    # Validate before building
-    validator = Path(__file__).resolve().parent / "validate_papers.py"
-    if validator.exists():
-        subprocess.run([sys.executable, str(validator)], check=True)
-
-    out_path = out_dir / "papers.json"
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    # Write to a temp file and swap it in, so doctor never sees a half-written papers.json
+    tmp_path = out_path.with_suffix(".json.tmp")
+    if orjson is not None:
+        tmp_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with tmp_path.open("w", encoding="utf-8", buffering=1 << 20) as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, out_path)
+    hash_path.write_text(digest + "\n")
 
     print(f"Wrote {out_path} ({len(papers)} papers)")
 
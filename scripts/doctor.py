@@ -10,27 +10,40 @@ Usage:
 
 import argparse
 import json
+import mmap
 import os
 import sys
+from collections import Counter
 from datetime import datetime
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+try:
+    import ijson
+except ImportError:
+    ijson = None  # full json.load fallback in _scan_papers_json
+
 try:
     import yaml
 except Exception:
     yaml = None  # handled below
 
+if yaml is not None:
+    # outside the try above: a _yaml_cache failure (e.g. REQUIRE_LIBYAML) must not
+    # be reported as "PyYAML not installed"
+    from _yaml_cache import load_mirrored
 
-ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROOT = Path(__file__).resolve().parents[1]
 
 PATHS = {
-    "papers_yaml": os.path.join(ROOT, "data", "papers.yaml"),
-    "citations_json": os.path.join(ROOT, "data", "citations.json"),
-    "papers_json": os.path.join(ROOT, "site", "public", "data", "papers.json"),
-    "index_html": os.path.join(ROOT, "site", "index.html"),
-    "app_js": os.path.join(ROOT, "site", "app.js"),
-    "readme": os.path.join(ROOT, "README.md"),
-    "maintenance": os.path.join(ROOT, "MAINTENANCE.md"),
+    "papers_yaml": ROOT / "data" / "papers.yaml",
+    "citations_json": ROOT / "data" / "citations.json",
+    "papers_json": ROOT / "site" / "public" / "data" / "papers.json",
+    "index_html": ROOT / "site" / "index.html",
+    "app_js": ROOT / "site" / "app.js",
+    "readme": ROOT / "README.md",
+    "maintenance": ROOT / "MAINTENANCE.md",
 }
 
 README_MARKERS = (
@@ -41,14 +54,21 @@ README_MARKERS = (
 ROUTES_EXPECTED = ("/about", "/editorial-policy")
 
 
-def _exists(path: str) -> bool:
-    return os.path.exists(path)
+def _stat(path: Path) -> Optional[os.stat_result]:
+    # one syscall answers both "exists?" and "mtime?"
+    try:
+        return path.stat()
+    except OSError:
+        return None
 
 
-def _mtime(path: str) -> Optional[float]:
-    if not _exists(path):
-        return None
-    return os.path.getmtime(path)
+def _exists(path: Path) -> bool:
+    return _stat(path) is not None
+
+
+def _mtime(path: Path) -> Optional[float]:
+    st = _stat(path)
+    return st.st_mtime if st is not None else None
 
 
 def _fmt_time(ts: Optional[float]) -> str:
@@ -57,21 +77,32 @@ def _fmt_time(ts: Optional[float]) -> str:
     return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
 
 
-def _read_text(path: str) -> str:
+def _read_text(path: Path) -> str:
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
 
 
-def _read_json(path: str) -> Any:
+def _contains(path: Path, needles: Tuple[str, ...]) -> Dict[str, bool]:
+    """Which needles occur in the file, searched on a read-only mmap (no read() copy)."""
+    with open(path, "rb") as f:
+        try:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file cannot be mapped
+            return {n: False for n in needles}
+        with m:
+            return {n: m.find(n.encode("utf-8")) >= 0 for n in needles}
+
+
+def _read_json(path: Path) -> Any:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
-def _read_yaml(path: str) -> Any:
+def _read_yaml(path: Path) -> Any:
     if yaml is None:
         raise RuntimeError("PyYAML not installed. Run: pip install pyyaml")
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    # prefers the data/papers.json mirror when it is up to date
+    return load_mirrored(path)
 
 
 def warn(msg: str) -> None:
@@ -94,7 +125,7 @@ def die(msg: str, code: int = 1) -> None:
 def check_files(strict: bool) -> int:
     issues = 0
     for k, p in PATHS.items():
-        if _exists(p):
+        if _stat(p) is not None:
             ok(f"{k}: {p}")
         else:
             issues += 1
@@ -129,8 +160,7 @@ def check_index_hooks(strict: bool) -> int:
     issues = 0
 
     if _exists(PATHS["index_html"]):
-        html = _read_text(PATHS["index_html"])
-        if 'id="indexIntro"' in html:
+        if _contains(PATHS["index_html"], ('id="indexIntro"',))['id="indexIntro"']:
             ok("index.html: found #indexIntro (explainer host).")
         else:
             issues += 1
@@ -140,15 +170,18 @@ def check_index_hooks(strict: bool) -> int:
         warn("index.html missing (skipping #indexIntro check).")
 
     if _exists(PATHS["app_js"]):
-        js = _read_text(PATHS["app_js"])
         # lightweight checks — not brittle parsing
-        if "joinBase(" in js and "computeBasePrefix" in js:
+        has = _contains(
+            PATHS["app_js"],
+            ("joinBase(", "computeBasePrefix", "renderIndexIntroOnce", "renderIndexExplainerOnce", "renderIndexExplainer"),
+        )
+        if has["joinBase("] and has["computeBasePrefix"]:
             ok("app.js: base-path aware routing helpers present.")
         else:
             issues += 1
             warn("app.js: base-path helpers not found (Pages subpath routing might break).")
 
-        if "renderIndexIntroOnce" in js or "renderIndexExplainerOnce" in js or "renderIndexExplainer" in js:
+        if has["renderIndexIntroOnce"] or has["renderIndexExplainerOnce"] or has["renderIndexExplainer"]:
             ok("app.js: index explainer rendering present.")
         else:
             issues += 1
@@ -174,8 +207,18 @@ def check_yaml_integrity(strict: bool) -> int:
         return die("data/papers.yaml: expected non-empty top-level 'papers:' list.", 5)  # type: ignore
 
     ok(f"papers.yaml: loaded {len(papers)} paper(s).")
+    if not getattr(yaml, "__with_libyaml__", False):
+        # not an issue, just slow: the pure-Python loader is ~10x slower
+        warn("PyYAML built without libyaml (slow YAML parsing). Run: pip install --force-reinstall pyyaml")
+
+    ids_list = [str(p.get("id") or "").strip() for p in papers if isinstance(p, dict)]
+    for pid, n in Counter(ids_list).items():
+        if pid and n > 1:
+            issues += n - 1
+            warn(f"papers.yaml: duplicate id: {pid}")
+    ids: Set[str] = set(ids_list)
 
-    ids: Set[str] = set()
+    deferred: List[Tuple[str, str]] = []
     for i, p in enumerate(papers, start=1):
         if not isinstance(p, dict):
             issues += 1
@@ -187,10 +230,6 @@ def check_yaml_integrity(strict: bool) -> int:
             issues += 1
             warn(f"papers.yaml: entry #{i} missing id.")
             continue
-        if pid in ids:
-            issues += 1
-            warn(f"papers.yaml: duplicate id: {pid}")
-        ids.add(pid)
 
         # minimal required fields
         for field in ("title", "year", "venue", "publication_status"):
@@ -213,23 +252,14 @@ def check_yaml_integrity(strict: bool) -> int:
             for r in rels:
                 if isinstance(r, dict):
                     tgt = r.get("target") or r.get("target_id") or r.get("paper_id")
-                    if tgt and str(tgt) not in ids:
-                        # might refer forward; check after full pass
-                        pass
+                    if tgt:
+                        # might refer forward; checked once ids contains all
+                        deferred.append((pid, str(tgt)))
 
-    # second pass for relation targets (now ids contains all)
-    for p in papers:
-        pid = str(p.get("id") or "").strip()
-        rels = p.get("relations")
-        if not pid or not isinstance(rels, list):
-            continue
-        for r in rels:
-            if not isinstance(r, dict):
-                continue
-            tgt = r.get("target") or r.get("target_id") or r.get("paper_id")
-            if tgt and str(tgt) not in ids:
-                issues += 1
-                warn(f"{pid}: relation target not found in dataset: {tgt}")
+    for pid, tgt in deferred:
+        if tgt not in ids:
+            issues += 1
+            warn(f"{pid}: relation target not found in dataset: {tgt}")
 
     if strict and issues:
         die("YAML integrity checks failed in strict mode.", 6)
@@ -271,6 +301,42 @@ def check_build_freshness(strict: bool) -> int:
     return issues
 
 
+def _scan_papers_json(path: Path) -> Tuple[int, List[Any], bool]:
+    """
+    Return (paper count, ids missing citations.count, citations_meta present).
+    With ijson this is one streaming pass that only looks at papers[].id,
+    papers[].citations.count and citations_meta — nothing else is materialized.
+    """
+    if ijson is None:
+        data = _read_json(path) or {}
+        papers = data.get("papers") or []
+        if not isinstance(papers, list):
+            return 0, [], bool(data.get("citations_meta"))
+        missing = [p.get("id") for p in papers if not ((p.get("citations") or {}).get("count") or 0)]
+        return len(papers), missing, bool(data.get("citations_meta"))
+
+    n = 0
+    missing = []
+    has_meta = False
+    pid, count = None, 0
+    with open(path, "rb") as f:
+        for prefix, event, value in ijson.parse(f):
+            if prefix == "papers.item":
+                if event == "start_map":
+                    pid, count = None, 0
+                elif event == "end_map":
+                    n += 1
+                    if not count:
+                        missing.append(pid)
+            elif prefix == "papers.item.id":
+                pid = value
+            elif prefix == "papers.item.citations.count":
+                count = value
+            elif prefix == "citations_meta" and event == "map_key":
+                has_meta = True
+    return n, missing, has_meta
+
+
 def check_citations_visibility(strict: bool) -> int:
     """
     Check that papers.json actually contains citations.count for most papers,
@@ -282,32 +348,24 @@ def check_citations_visibility(strict: bool) -> int:
         warn("papers.json missing (skipping citations visibility checks).")
         return 1
 
-    data = _read_json(PATHS["papers_json"]) or {}
-    papers = data.get("papers") or []
-    if not isinstance(papers, list) or not papers:
+    n_papers, missing, has_meta = _scan_papers_json(PATHS["papers_json"])
+    if not n_papers:
         warn("papers.json has no 'papers' list (unexpected shape).")
         return 1
 
-    missing = []
-    for p in papers:
-        c = (p.get("citations") or {})
-        if not (c.get("count") or 0):
-            missing.append(p.get("id"))
-
     if missing:
         warn(f"papers.json: {len(missing)} paper(s) missing citations.count: {missing}")
         warn("This can be OK if Scholar/S2 blocked or a paper has no match yet.")
     else:
         ok("papers.json: all papers have citations.count.")
 
-    meta = data.get("citations_meta")
-    if meta:
+    if has_meta:
         ok("papers.json: citations_meta present.")
     else:
         warn("papers.json: citations_meta missing (not fatal, but citeMeta line will be blank).")
 
     # strict mode: only fail if *most* citations missing
-    if strict and len(missing) > max(1, len(papers) // 2):
+    if strict and len(missing) > max(1, n_papers // 2):
         die("Too many missing citations in strict mode.", 9)
 
     return issues
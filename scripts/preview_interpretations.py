@@ -1,7 +1,6 @@
-import yaml
-from pathlib import Path
+from _yaml_cache import load_mirrored
 
-papers = yaml.safe_load(Path("../data/papers.yaml").read_text())
+papers = load_mirrored("../data/papers.yaml")
 
 for p in papers:
     if "why_it_matters" in p:
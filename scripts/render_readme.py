@@ -1,9 +1,8 @@
 # scripts/render_readme.py
 import os
-import re
 from typing import Any, Dict, List
 
-import yaml
+from scripts._yaml_cache import load_mirrored
 from scripts.utils import read_json
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
@@ -14,76 +13,77 @@ README_MD = os.path.join(ROOT, "README.md")
 START_MARKER = "<!-- DIFFUSION_LIGHTHOUSE_TABLE_START -->"
 END_MARKER = "<!-- DIFFUSION_LIGHTHOUSE_TABLE_END -->"
 
+# Shared read-only fallback for missing mappings (never mutated)
+_EMPTY = {}  # type: Dict[str, Any]
 
-def md_link(label, url):
-    return "[{0}]({1})".format(label, url) if url else ""
+
+def _fmt_row(r):
+    links_obj = r.get("links") or _EMPTY
+    arxiv = links_obj.get("arxiv", "")
+    title = r.get("title", "")
+    title_cell = f"[{title}]({arxiv})" if arxiv else title
+
+    citations = r.get("citations", None)
+    citations_cell = f"{citations:,}" if isinstance(citations, int) else "—"  # 12,345
+
+    checked = r.get("last_checked_utc") or "—"
+    tags = ", ".join(r.get("tags", []) or [])
+
+    links = []
+    if arxiv:
+        links.append(f"[arXiv]({arxiv})")
+    doi = links_obj.get("doi")
+    if doi:
+        links.append(f"[DOI]({doi})")
+    pdf = links_obj.get("pdf")
+    if pdf:
+        links.append(f"[PDF]({pdf})")
+    scholar_url = r.get("scholar_url")
+    if scholar_url:
+        links.append(f"[Scholar]({scholar_url})")
+
+    links_cell = " · ".join(links) if links else "—"
+    return title_cell, citations_cell, checked, tags, links_cell
 
 
 def render_table(rows):
-    lines = []
-    lines.append("| # | Title | Year | Venue | Citations | Last checked (UTC) | Tags | Links |")
-    lines.append("|---:|---|---:|---|---:|---|---|---|")
-    for i, r in enumerate(rows, start=1):
-        title = r.get("title", "")
-        links_obj = r.get("links", {}) or {}
-        arxiv = links_obj.get("arxiv", "")
-        title_cell = md_link(title, arxiv) if arxiv else title
-
-        year = r.get("year", "")
-        venue = r.get("venue", "")
-        citations = r.get("citations", None)
-        if isinstance(citations, int):
-            citations_cell = "{0:,}".format(citations)  # 12,345
-        else:
-            citations_cell = "—"
-
-        checked = r.get("last_checked_utc") or "—"
-        tags = ", ".join(r.get("tags", []) or [])
-
-        links = []
-        if links_obj.get("arxiv"):
-            links.append(md_link("arXiv", links_obj["arxiv"]))
-        if links_obj.get("doi"):
-            links.append(md_link("DOI", links_obj["doi"]))
-        if links_obj.get("pdf"):
-            links.append(md_link("PDF", links_obj["pdf"]))
-
-        scholar_url = r.get("scholar_url") or ""
-        if scholar_url:
-            links.append(md_link("Scholar", scholar_url))
-
-        links_cell = " · ".join([x for x in links if x]) if links else "—"
-
-        lines.append("| {0} | {1} | {2} | {3} | {4} | {5} | {6} | {7} |".format(
-            i, title_cell, year, venue, citations_cell, checked, tags, links_cell
-        ))
+    lines = [
+        "| # | Title | Year | Venue | Citations | Last checked (UTC) | Tags | Links |",
+        "|---:|---|---:|---|---:|---|---|---|",
+    ]
+    lines.extend(
+        f"| {i} | {title_cell} | {r.get('year', '')} | {r.get('venue', '')} | {citations_cell} | {checked} | {tags} | {links_cell} |"
+        for i, r in enumerate(rows, start=1)
+        for title_cell, citations_cell, checked, tags, links_cell in (_fmt_row(r),)
+    )
     return "\n".join(lines)
 
 
 def build_table_block(cfg, citations):
-    c_papers = citations.get("papers", {}) or {}
+    c_papers = citations.get("papers") or _EMPTY
 
     rows = []
     for p in cfg.get("papers", []) or []:
         pid = p.get("id")
         if not pid:
             continue
-        c = c_papers.get(pid, {}) or {}
+        c = c_papers.get(pid) or _EMPTY
         row = dict(p)
         row["citations"] = c.get("citations")
         row["last_checked_utc"] = c.get("last_checked_utc")
-        row["scholar_url"] = c.get("scholar_url") or (p.get("scholar", {}) or {}).get("scholar_url")
+        row["scholar_url"] = c.get("scholar_url") or (p.get("scholar") or _EMPTY).get("scholar_url")
         rows.append(row)
 
-    def sort_key(r):
-        c = r.get("citations")
-        c_key = c if isinstance(c, int) else -1
-        y = r.get("year") or 0
-        return (c_key, y)
+    # Most cited first, then newest; negated keys + index keep the
+    # tuple comparison in C and preserve input order on ties
+    decorated = [
+        (-(r["citations"] if isinstance(r["citations"], int) else -1), -(r.get("year") or 0), i, r)
+        for i, r in enumerate(rows)
+    ]
+    decorated.sort()
+    rows = [t[-1] for t in decorated]
 
-    rows.sort(key=sort_key, reverse=True)
-
-    last_updated = (citations.get("meta", {}) or {}).get("last_updated_utc") or "—"
+    last_updated = (citations.get("meta") or _EMPTY).get("last_updated_utc") or "—"
 
     block_lines = []
     block_lines.append(START_MARKER)
@@ -97,8 +97,7 @@ def build_table_block(cfg, citations):
 
 
 def main():
-    with open(PAPERS_YAML, "r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f) or {}
+    cfg = load_mirrored(PAPERS_YAML) or {}
 
     citations = read_json(CITATIONS_JSON, default={"meta": {}, "papers": {}})
 
@@ -109,7 +108,9 @@ def main():
     else:
         readme = "# 🌊 Diffusion Lighthouse\n\n## Papers\n\n{0}\n\n{1}\n".format(START_MARKER, END_MARKER)
 
-    if START_MARKER not in readme or END_MARKER not in readme:
+    start = readme.find(START_MARKER)
+    end = readme.find(END_MARKER, start) if start >= 0 else -1
+    if end < 0:
         raise RuntimeError(
             "README.md must contain both markers:\n{0}\n{1}".format(START_MARKER, END_MARKER)
         )
@@ -117,11 +118,7 @@ def main():
     new_block = build_table_block(cfg, citations)
 
     # Replace everything between markers (inclusive) with new_block
-    pattern = re.compile(
-        re.escape(START_MARKER) + r".*?" + re.escape(END_MARKER),
-        re.DOTALL
-    )
-    updated = pattern.sub(new_block, readme, count=1)
+    updated = readme[:start] + new_block + readme[end + len(END_MARKER):]
 
     with open(README_MD, "w", encoding="utf-8") as f:
         f.write(updated)
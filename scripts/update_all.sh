@@ -43,6 +43,8 @@ fi
 
 echo ""
 echo "[3/4] Build dataset (writes site/public/data/papers.json)"
+# JSON mirror of papers.yaml so the build (and doctor) skip YAML parsing
+python scripts/yaml_to_json.py
 python scripts/build_dataset.py
 
 echo ""
@@ -1,71 +1,249 @@
-# scripts/update_citations.py (Python 3.6)
+# scripts/update_citations.py (Python 3.7+)
+import asyncio
+import atexit
+import calendar
 import os
 import re
 import time
 import random
-from typing import Dict, Optional, Tuple
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import yaml
 
-from scripts.utils import read_json, write_json, append_jsonl, now_utc_iso, sleep_backoff
+try:
+    # C HTML parser, much faster than BeautifulSoup + lxml
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser  # selectolax < 0.3.13
+    except ImportError:
+        HTMLParser = None
+        from bs4 import BeautifulSoup
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None  # Semantic Scholar fallback then runs serially over SESSION
+
+from scripts._yaml_cache import SafeLoader
+from scripts.utils import read_json, write_json, append_jsonl_many, now_utc_iso
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
 PAPERS_YAML = os.path.join(ROOT, "data", "papers.yaml")
 CITATIONS_JSON = os.path.join(ROOT, "data", "citations.json")
 HISTORY_JSONL = os.path.join(ROOT, "data", "citations.history.jsonl")
-
-SCHOLAR_BASE = "https://scholar.google.com/scholar"
+# ETag / Last-Modified per Scholar cluster URL, for conditional GETs (local only)
+SCHOLAR_CACHE_JSON = os.path.join(ROOT, "data", "citations.cache.json")
+# Semantic Scholar lookup key -> last result, reused for S2_CACHE_TTL (local only)
+S2_CACHE_JSON = os.path.join(ROOT, "data", "s2.cache.json")
+S2_CACHE_TTL = 24 * 3600
+
+SCHOLAR_ORIGIN = "https://scholar.google.com"
+SCHOLAR_BASE = SCHOLAR_ORIGIN + "/scholar"
 UA = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
 
-# Delay between papers (seconds)
+# Delay between papers (seconds): starts at MIN_DELAY, adapts (AIMD) up to MAX_DELAY * 4
 MIN_DELAY = int(os.environ.get("MIN_DELAY", "20"))
 MAX_DELAY = int(os.environ.get("MAX_DELAY", "35"))
+AIMD_STEP = 0.5  # seconds shaved off after each successful Scholar request
+
+# Papers checked less than this many hours ago are left alone (FORCE=1 refreshes everything)
+MIN_REFRESH_HOURS = int(os.environ.get("MIN_REFRESH_HOURS", "20"))
+
+MAX_HTML_BYTES = 256 * 1024  # Scholar pages are read at most this far
 
 # Semantic Scholar endpoints (no key required for light usage)
 S2_PAPER = "https://api.semanticscholar.org/graph/v1/paper/{paper_id}"
 S2_FIELDS = "title,citationCount,url,year,venue"
 S2_SEARCH = "https://api.semanticscholar.org/graph/v1/paper/search"
 S2_SEARCH_FIELDS = "paperId,title,year,venue,citationCount,url"
+S2_BATCH = "https://api.semanticscholar.org/graph/v1/paper/batch"
+S2_BATCH_FIELDS = "citationCount,url"
+S2_BATCH_SIZE = 500  # API maximum ids per batch request
+S2_CONCURRENCY = int(os.environ.get("S2_CONCURRENCY", "5"))
+
+_RE_CITED_BY = re.compile(r"\bCited by\s+(\d+)\b")
+_RE_ARXIV = re.compile(r"arxiv\.org/(abs|pdf)/([0-9]{4}\.[0-9]{4,5})(v\d+)?")
+_RE_DOI = re.compile(r"doi\.org/(10\.\d{4,9}/\S+)")
+
+
+# One keep-alive session for the whole run (no TCP/TLS handshake per paper).
+# Connection errors and 5xx are retried inside the adapters on the pooled socket;
+# whatever is still failing after that is returned as-is (raise_on_status=False)
+# for scholar_get / s2_request to handle.
+# Semantic Scholar: 429 is retried too, honouring Retry-After. POST is included
+# for the read-only /paper/batch lookup.
+RETRY = Retry(
+    total=3,
+    backoff_factor=1.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=("GET", "POST"),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+# Google Scholar: never re-send on 429, it must reach the Pacer (back off, don't hammer)
+SCHOLAR_RETRY = Retry(
+    total=3,
+    backoff_factor=1.5,
+    status_forcelist=(500, 502, 503, 504),
+    allowed_methods=("GET",),
+    respect_retry_after_header=False,  # otherwise urllib3 retries a 429 carrying Retry-After anyway
+    raise_on_status=False,
+)
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=RETRY))
+SESSION.mount(SCHOLAR_ORIGIN, HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=SCHOLAR_RETRY))
+SESSION.headers.update({"User-Agent": UA, "Accept-Language": "en-US,en;q=0.9"})
+atexit.register(SESSION.close)
 
 
 class ScholarBlocked(Exception):
     pass
 
 
-def choose_delay():
-    lo = MIN_DELAY
-    hi = MAX_DELAY
-    if hi < lo:
-        hi = lo
-    return random.randint(lo, hi)
+class ScholarRateLimited(RuntimeError):
+    def __init__(self, retry_after=None):
+        # type: (Optional[float]) -> None
+        super().__init__("HTTP 429")
+        self.retry_after = retry_after
 
 
-def fetch_html(url, params=None, timeout=20):
-    # type: (str, Optional[Dict[str, str]], int) -> str
-    headers = {"User-Agent": UA, "Accept-Language": "en-US,en;q=0.9"}
-    r = requests.get(url, params=params, headers=headers, timeout=timeout)
-    text = r.text or ""
-    low = text.lower()
+class Pacer(object):
+    """
+    AIMD delay between Scholar requests: additive decrease while Scholar is
+    happy, multiplicative increase on HTTP 429 / captcha.
+    """
+
+    def __init__(self):
+        self.delay = float(MIN_DELAY)
+
+    def success(self):
+        self.delay = max(float(MIN_DELAY), self.delay - AIMD_STEP)
+
+    def backoff(self):
+        self.delay = min(MAX_DELAY * 4.0, max(self.delay, 1.0) * 2.0)
+
+    def sleep(self):
+        d = self.delay + random.uniform(0, 2)  # jitter
+        print("  Sleeping {0:.1f}s...".format(d))
+        time.sleep(d)
+
+
+def checked_recently(entry, now):
+    # type: (Dict[str, Any], float) -> bool
+    """True if `entry["last_checked_utc"]` lies within the last MIN_REFRESH_HOURS."""
+    ts = entry.get("last_checked_utc")
+    if not ts:
+        return False
+    try:
+        then = calendar.timegm(time.strptime(ts, "%Y-%m-%dT%H:%M:%SZ"))
+    except (TypeError, ValueError):
+        return False
+    return now - then < MIN_REFRESH_HOURS * 3600
+
+
+def retry_after_seconds(value):
+    # type: (Optional[str]) -> Optional[float]
+    """Parse a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, dt.timestamp() - time.time())
+
+
+def scholar_get(url, params=None, timeout=20, headers=None):
+    # type: (str, Optional[Dict[str, str]], int, Optional[Dict[str, str]]) -> Tuple[int, Any, str]
+    """
+    GET a Scholar page -> (status_code, headers, html); raises on captcha / 429 /
+    HTTP errors (304 passes through). The body is streamed and cut off at
+    MAX_HTML_BYTES; anything shorter is read to the end so the connection
+    goes back to the keep-alive pool.
+    """
+    buf = bytearray()
+    with SESSION.get(url, params=params, headers=headers, timeout=timeout, stream=True) as r:
+        for chunk in r.iter_content(65536):
+            buf += chunk
+            if len(buf) >= MAX_HTML_BYTES:
+                break
+        html = bytes(buf).decode(r.encoding or "utf-8", errors="replace")
+
+    low = html.lower()
     if "captcha" in low or "unusual traffic" in low:
         raise ScholarBlocked("Google Scholar appears to be blocking requests (captcha/unusual traffic).")
+    if r.status_code == 429:
+        raise ScholarRateLimited(retry_after_seconds(r.headers.get("Retry-After")))
     if r.status_code >= 400:
         raise RuntimeError("HTTP {0}".format(r.status_code))
-    return text
+    return r.status_code, r.headers, html
+
+
+def fetch_html(url, params=None, timeout=20):
+    # type: (str, Optional[Dict[str, str]], int) -> str
+    return scholar_get(url, params=params, timeout=timeout)[2]
+
+
+def s2_rate_limit_pause(headers):
+    # type: (Any) -> float
+    """
+    Seconds to pause before the next Semantic Scholar call: back off *before*
+    hitting 429 once x-ratelimit-remaining-requests drops under ~10% of the quota.
+    """
+    try:
+        remaining = int(headers.get("x-ratelimit-remaining-requests", "999"))
+        limit = int(headers.get("x-ratelimit-limit-requests", "0"))
+    except ValueError:
+        return 0.0
+    if remaining <= max(2, limit // 10):
+        return retry_after_seconds(headers.get("retry-after")) or 2.0
+    return 0.0
+
+
+def s2_request(method, url, params=None, json_body=None, timeout=20):
+    # type: (str, str, Optional[Dict[str, Any]], Any, int) -> requests.Response
+    # 429 / 5xx were already retried by the adapter (see RETRY)
+    r = SESSION.request(method, url, params=params, json=json_body, timeout=timeout)
+    pause = s2_rate_limit_pause(r.headers)
+    if pause:
+        time.sleep(pause)
+    return r
+
+
+def s2_cache_key(paper):
+    # type: (dict) -> str
+    return semantic_scholar_id(paper) or "title:" + str(paper.get("title") or "").strip().lower()
+
+
+def s2_cache_get(cache, paper):
+    # type: (Dict[str, Any], dict) -> Optional[Tuple[int, str, str]]
+    """(citations, url, checked_utc) of a cached lookup younger than S2_CACHE_TTL, or None."""
+    hit = cache.get(s2_cache_key(paper))
+    if hit and time.time() - hit.get("ts", 0) < S2_CACHE_TTL:
+        checked = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(hit["ts"]))
+        return (hit["citations"], hit.get("url") or "", checked)
+    return None
+
+
+def s2_cache_put(cache, paper, result):
+    # type: (Dict[str, Any], dict, Tuple[int, str]) -> None
+    cache[s2_cache_key(paper)] = {"citations": result[0], "url": result[1], "ts": time.time()}
 
 
 def fetch_semantic_scholar_by_title(title):
     # type: (str) -> Optional[Tuple[int, str]]
     if not title:
         return None
-    headers = {"User-Agent": UA}
-    r = requests.get(
-        S2_SEARCH,
-        params={"query": title, "limit": 5, "fields": S2_SEARCH_FIELDS},
-        headers=headers,
-        timeout=20,
-    )
+    r = s2_request("GET", S2_SEARCH, params={"query": title, "limit": 5, "fields": S2_SEARCH_FIELDS})
     if r.status_code == 429:
         raise RuntimeError("Semantic Scholar HTTP 429")
     if r.status_code >= 400:
@@ -88,28 +266,46 @@ def fetch_semantic_scholar_by_title(title):
 
 def parse_cited_by_anywhere(html):
     # type: (str) -> Optional[int]
-    m = re.search(r"\bCited by\s+(\d+)\b", html)
+    m = _RE_CITED_BY.search(html)
     if m:
         return int(m.group(1))
     return None
 
 
-def parse_first_result(html):
-    # type: (str) -> Optional[Tuple[int, str]]
+def _first_result_block(html):
+    # type: (str) -> Optional[Tuple[str, List[Tuple[str, str]]]]
+    """Text of the first div.gs_r and its links as (href, lowercased text), or None."""
+    if HTMLParser is not None:
+        first = HTMLParser(html).css_first("div.gs_r")
+        if first is None:
+            return None
+        links = [(a.attributes.get("href") or "", a.text(separator=" ", strip=True).lower()) for a in first.css("a")]
+        return first.text(separator=" ", strip=True), links
+
     soup = BeautifulSoup(html, "lxml")
     first = soup.select_one("div.gs_r")
     if not first:
         return None
+    links = [(a.get("href") or "", a.get_text(" ", strip=True).lower()) for a in first.select("a")]
+    return first.get_text(" ", strip=True), links
+
+
+def parse_first_result(html):
+    # type: (str) -> Optional[Tuple[int, str]]
+    if "Cited by" not in html:
+        return None  # nothing to extract; skip building the DOM
 
-    block_text = first.get_text(" ", strip=True)
-    m = re.search(r"\bCited by\s+(\d+)\b", block_text)
+    block = _first_result_block(html)
+    if block is None:
+        return None
+
+    block_text, links = block
+    m = _RE_CITED_BY.search(block_text)
     citations = int(m.group(1)) if m else None
 
     # Prefer a Scholar cites/cluster link if present
     scholar_url = ""
-    for a in first.select("a"):
-        href = a.get("href") or ""
-        txt = a.get_text(" ", strip=True).lower()
+    for href, txt in links:
         if ("cites=" in href or "cluster=" in href) and ("scholar.google" in href or href.startswith("/")):
             if href.startswith("/"):
                 scholar_url = "https://scholar.google.com" + href
@@ -134,9 +330,42 @@ def update_one_by_query(query):
     return parse_first_result(html)
 
 
-def update_one_by_url(scholar_url):
-    # Fetch cluster/cites URL directly and parse "Cited by N" anywhere in HTML
-    html = fetch_html(scholar_url, params=None, timeout=20)
+def update_one_by_url(scholar_url, cache=None):
+    # type: (str, Optional[Dict[str, Any]]) -> Optional[Tuple[int, str]]
+    """
+    Fetch cluster/cites URL directly and parse "Cited by N" anywhere in HTML.
+    With a `cache` (scholar_url -> etag/last_modified/result), send a conditional
+    GET; a 304 reuses the cached result without downloading or parsing the page.
+    """
+    entry = (cache or {}).get(scholar_url) or {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    status, resp_headers, html = scholar_get(scholar_url, params=None, timeout=20, headers=headers or None)
+    if status == 304 and entry.get("citations") is not None:
+        return (entry["citations"], entry.get("scholar_url") or scholar_url)
+
+    result = _parse_cluster_page(html, scholar_url)
+    etag = resp_headers.get("ETag")
+    last_modified = resp_headers.get("Last-Modified")
+    if cache is not None and result is not None and (etag or last_modified):
+        cache[scholar_url] = {
+            "etag": etag or "",
+            "last_modified": last_modified or "",
+            "citations": result[0],
+            "scholar_url": result[1],
+            "checked_utc": now_utc_iso(),
+        }
+    return result
+
+
+def _parse_cluster_page(html, scholar_url):
+    # type: (str, str) -> Optional[Tuple[int, str]]
+    if "Cited by" not in html:
+        return None
     citations = parse_cited_by_anywhere(html)
     if citations is None:
         # Some pages might be weird; fallback to first-result parser
@@ -153,7 +382,7 @@ def arxiv_id_from_url(arxiv_url):
     if not arxiv_url:
         return None
     # handles: https://arxiv.org/abs/2006.11239 or .../abs/2006.11239v2
-    m = re.search(r"arxiv\.org/(abs|pdf)/([0-9]{4}\.[0-9]{4,5})(v\d+)?", arxiv_url)
+    m = _RE_ARXIV.search(arxiv_url)
     if not m:
         return None
     return m.group(2)
@@ -166,33 +395,52 @@ def doi_from_url(doi_url):
     # allow raw DOI or doi.org link
     if doi_url.startswith("10."):
         return doi_url
-    m = re.search(r"doi\.org/(10\.\d{4,9}/\S+)", doi_url)
+    m = _RE_DOI.search(doi_url)
     return m.group(1) if m else None
 
 
-def fetch_semantic_scholar_citations(paper):
-    # type: (dict) -> Optional[Tuple[int, str]]
+def semantic_scholar_id(paper):
+    # type: (dict) -> Optional[str]
+    """ARXIV:<id> or DOI:<doi> for the S2 graph API, or None."""
+    links = paper.get("links", {}) or {}
+    aid = arxiv_id_from_url(links.get("arxiv", ""))
+    if aid:
+        return "ARXIV:{0}".format(aid)
+    d = doi_from_url(links.get("doi", ""))
+    return "DOI:{0}".format(d) if d else None
+
+
+def fetch_s2_batch(paper_ids):
+    # type: (List[str]) -> Dict[str, Tuple[int, str]]
     """
-    Returns (citationCount, semantic_scholar_url) or None.
-    Prefer ARXIV id, then DOI, then title search.
+    (citationCount, semantic_scholar_url) for ARXIV:/DOI: ids via POST /paper/batch,
+    up to S2_BATCH_SIZE ids per request. Ids S2 does not know are left out.
     """
-    links = paper.get("links", {}) or {}
-    arxiv = links.get("arxiv", "")
-    doi = links.get("doi", "")
+    found = {}  # type: Dict[str, Tuple[int, str]]
+    for i in range(0, len(paper_ids), S2_BATCH_SIZE):
+        chunk = paper_ids[i:i + S2_BATCH_SIZE]
+        r = s2_request("POST", S2_BATCH, params={"fields": S2_BATCH_FIELDS}, json_body={"ids": chunk}, timeout=30)
+        if r.status_code >= 400:
+            raise RuntimeError("Semantic Scholar batch HTTP {0}".format(r.status_code))
+        for paper_id, js in zip(chunk, r.json() or []):
+            cc = (js or {}).get("citationCount")
+            if isinstance(cc, int):
+                found[paper_id] = (cc, js.get("url") or "")
+    return found
 
-    aid = arxiv_id_from_url(arxiv)
-    if aid:
-        paper_id = "ARXIV:{0}".format(aid)
-    else:
-        d = doi_from_url(doi)
-        paper_id = "DOI:{0}".format(d) if d else None
 
-    headers = {"User-Agent": UA}
+def fetch_semantic_scholar_citations(paper, by_id=True):
+    # type: (dict, bool) -> Optional[Tuple[int, str]]
+    """
+    Returns (citationCount, semantic_scholar_url) or None.
+    Prefer ARXIV id, then DOI, then title search.
+    """
+    paper_id = semantic_scholar_id(paper) if by_id else None
 
     # 1) Try ARXIV/DOI lookup if we have it
     if paper_id:
         url = S2_PAPER.format(paper_id=paper_id)
-        r = requests.get(url, params={"fields": S2_FIELDS}, headers=headers, timeout=20)
+        r = s2_request("GET", url, params={"fields": S2_FIELDS})
         if r.status_code == 429:
             raise RuntimeError("Semantic Scholar HTTP 429")
         if r.status_code != 404 and r.status_code >= 400:
@@ -208,11 +456,88 @@ def fetch_semantic_scholar_citations(paper):
     return fetch_semantic_scholar_by_title(title)
 
 
+async def _s2_fetch(session, url, params):
+    async with session.get(url, params=params) as r:
+        js = await r.json(content_type=None) if r.status < 400 else None
+        return r.status, r.headers, js
+
+
+async def _s2_get_json(session, url, params):
+    status, headers, js = await _s2_fetch(session, url, params)
+    if status == 429:
+        # same recovery as s2_request: wait as long as asked, then retry once
+        await asyncio.sleep(retry_after_seconds(headers.get("Retry-After")) or 2.0)
+        status, headers, js = await _s2_fetch(session, url, params)
+    pause = s2_rate_limit_pause(headers)
+    if pause:
+        await asyncio.sleep(pause)
+
+    if status == 429:
+        raise RuntimeError("Semantic Scholar HTTP 429")
+    if status == 404:
+        return None
+    if status >= 400:
+        raise RuntimeError("Semantic Scholar HTTP {0}".format(status))
+    return js
+
+
+async def fetch_s2(session, sem, paper, by_id=True):
+    # type: (aiohttp.ClientSession, asyncio.Semaphore, dict, bool) -> Optional[Tuple[int, str]]
+    """Async twin of fetch_semantic_scholar_citations (ARXIV/DOI lookup, then title search)."""
+    async with sem:
+        paper_id = semantic_scholar_id(paper) if by_id else None
+        if paper_id:
+            js = await _s2_get_json(session, S2_PAPER.format(paper_id=paper_id), {"fields": S2_FIELDS})
+            cc = (js or {}).get("citationCount")
+            if isinstance(cc, int):
+                return (cc, js.get("url") or "")
+
+        title = paper.get("title", "")
+        if not title:
+            return None
+        js = await _s2_get_json(session, S2_SEARCH, {"query": title, "limit": "5", "fields": S2_SEARCH_FIELDS})
+        data = (js or {}).get("data") or []
+        if data and isinstance(data[0].get("citationCount"), int):
+            return (data[0]["citationCount"], data[0].get("url") or "")
+        return None
+
+
+async def scrape_all(papers, title_only=frozenset()):
+    # type: (List[dict], frozenset) -> List[Any]
+    sem = asyncio.Semaphore(S2_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=20)
+    async with aiohttp.ClientSession(headers={"User-Agent": UA}, timeout=timeout, raise_for_status=False) as session:
+        return await asyncio.gather(
+            *(fetch_s2(session, sem, p, by_id=p["id"] not in title_only) for p in papers),
+            return_exceptions=True,
+        )
+
+
+def fetch_s2_fallbacks(papers, title_only=frozenset()):
+    # type: (List[dict], frozenset) -> List[Any]
+    """
+    One result per paper: (citations, url), None (no match) or the raised exception.
+    Papers whose id is in `title_only` skip the ARXIV/DOI lookup (already tried in batch).
+    """
+    if aiohttp is not None:
+        return asyncio.run(scrape_all(papers, title_only))
+
+    results = []  # type: List[Any]
+    for p in papers:
+        try:
+            results.append(fetch_semantic_scholar_citations(p, by_id=p["id"] not in title_only))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
 def main():
     with open(PAPERS_YAML, "r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f) or {}
+        cfg = yaml.load(f, Loader=SafeLoader) or {}
 
     store = read_json(CITATIONS_JSON, default={"meta": {}, "papers": {}})
+    scholar_cache = read_json(SCHOLAR_CACHE_JSON, default={})
+    s2_cache = read_json(S2_CACHE_JSON, default={})
     store.setdefault("meta", {})
     store.setdefault("papers", {})
 
@@ -224,10 +549,21 @@ def main():
 
     start = int(os.environ.get("START", "1"))
     end = int(os.environ.get("END", str(len(papers))))
+    force = os.environ.get("FORCE") == "1"
+    now = time.time()
 
     print("Running update for papers [{0}..{1}] out of {2}".format(start, end, len(papers)))
-    print("Delay between papers: {0}-{1}s".format(MIN_DELAY, MAX_DELAY))
+    print("Delay between papers: {0}s, adapting up to {1}s".format(MIN_DELAY, MAX_DELAY * 4))
+
+    # pid -> (citations, resolved_url, source_used)
+    results = {}  # type: Dict[str, Tuple[int, str, str]]
+    # pid -> when a cached result was actually fetched (everything else: run_ts)
+    checked_at = {}  # type: Dict[str, str]
+    fallback = []  # type: List[dict]
+    blocked = False
+    pacer = Pacer()
 
+    # ---- Phase 1: Google Scholar (serial, paced to avoid blocks) ----
     for idx, p in enumerate(papers, start=1):
         if idx < start or idx > end:
             continue
@@ -236,6 +572,11 @@ def main():
         if not pid:
             continue
 
+        if not force and checked_recently(store["papers"].get(pid) or {}, now):
+            print("[{0}/{1}] {2}: checked within {3}h (skipping; FORCE=1 to refresh)".format(
+                idx, len(papers), pid, MIN_REFRESH_HOURS))
+            continue
+
         scholar = p.get("scholar", {}) or {}
         scholar_url = scholar.get("scholar_url")
         query = scholar.get("scholar_query")
@@ -244,66 +585,106 @@ def main():
             print("[{0}/{1}] {2}: missing scholar_url or scholar_query (skipping)".format(idx, len(papers), pid))
             continue
 
-        old = store["papers"].get(pid, {}) or {}
-        old_citations = old.get("citations")
+        if blocked:
+            # Scholar is blocking us: don't hammer it, leave the rest to Semantic Scholar
+            fallback.append(p)
+            continue
 
         print("[{0}/{1}] Updating {2} ...".format(idx, len(papers), pid))
 
-        citations = None
-        resolved_url = ""
-        source_used = ""
-
-        # ---- Try Google Scholar first ----
-        blocked = False
-        for attempt in range(3):
-            try:
-                r = None
-                if scholar_url:
-                    r = update_one_by_url(scholar_url)
-                else:
-                    r = update_one_by_query(query)
-
-                if r is not None:
-                    citations, resolved_url = r
-                    source_used = "google_scholar"
-                break
-            except ScholarBlocked as e:
-                blocked = True
-                print("  Scholar blocked: {0}".format(e))
-                break
-            except Exception as e:
-                print("  Scholar attempt {0} failed: {1}".format(attempt + 1, e))
-                sleep_backoff(attempt)
-
-        # ---- Fallback to Semantic Scholar ----
-        if citations is None:
-            try:
-                fr = fetch_semantic_scholar_citations(p)
-                if fr is None:
-                    fr = fetch_semantic_scholar_by_title(p)
-                if fr is not None:
-                    citations, resolved_url = fr
-                    source_used = "semantic_scholar"
-                    print("  Fallback used: Semantic Scholar")
-                else:
-                    print("  Fallback failed: Semantic Scholar had no match (arXiv/DOI/title).")
-            except Exception as e:
-                print("  Fallback error: {0}".format(e))
-
-        # If still none, skip update for this paper
-        if citations is None:
-            if blocked:
-                # If Scholar is blocked, don't hammer further; stop run
-                print("Stopping update to avoid further blocks. (Fallback may still work next run.)")
-                break
-            print("  No citation info found; keeping old value.")
+        # transient failures were already retried by the session adapter
+        try:
+            if scholar_url:
+                r = update_one_by_url(scholar_url, cache=scholar_cache)
+            else:
+                r = update_one_by_query(query)
+
+            if r is not None:
+                results[pid] = (r[0], r[1], "google_scholar")
+            pacer.success()
+        except ScholarBlocked as e:
+            pacer.backoff()
+            blocked = True
+            print("  Scholar blocked: {0}".format(e))
+            print("  Skipping Scholar for the rest of this run (Semantic Scholar fallback only).")
+        except ScholarRateLimited as e:
+            pacer.backoff()
+            print("  Scholar rate-limited (HTTP 429)")
+            if e.retry_after is not None:
+                time.sleep(e.retry_after)
+        except Exception as e:
+            print("  Scholar failed: {0}".format(e))
+
+        if pid not in results:
+            fallback.append(p)
+        if not blocked:
+            pacer.sleep()
+
+    # ---- Phase 2: Semantic Scholar fallback (concurrent, no Scholar-style pacing needed) ----
+    if fallback:
+        print("Semantic Scholar fallback for {0} paper(s)...".format(len(fallback)))
+
+        # 0) anything looked up within the last S2_CACHE_TTL needs no request at all
+        uncached = []
+        for p in fallback:
+            fr = s2_cache_get(s2_cache, p)
+            if fr is None:
+                uncached.append(p)
+                continue
+            results[p["id"]] = (fr[0], fr[1], "semantic_scholar")
+            checked_at[p["id"]] = fr[2]
+            print("  {0}: fallback used: Semantic Scholar (cached {1})".format(p["id"], fr[2]))
+        fallback = uncached
+
+        # 1) every paper with an ARXIV/DOI id in ceil(N/500) batch requests
+        s2_ids = {p["id"]: semantic_scholar_id(p) for p in fallback}
+        try:
+            batch = fetch_s2_batch(sorted({i for i in s2_ids.values() if i}))
+            batch_tried = frozenset(pid for pid, i in s2_ids.items() if i)
+        except Exception as e:
+            print("  Semantic Scholar batch lookup failed: {0}".format(e))
+            batch, batch_tried = {}, frozenset()
+
+        rest = []
+        for p in fallback:
+            fr = batch.get(s2_ids[p["id"]])
+            if fr is None:
+                rest.append(p)
+                continue
+            results[p["id"]] = (fr[0], fr[1], "semantic_scholar")
+            s2_cache_put(s2_cache, p, fr)
+            print("  {0}: fallback used: Semantic Scholar (batch)".format(p["id"]))
+
+        # 2) per-paper lookups (title search) for whatever the batch could not resolve
+        for p, fr in zip(rest, fetch_s2_fallbacks(rest, title_only=batch_tried)):
+            pid = p["id"]
+            if isinstance(fr, Exception):
+                print("  {0}: fallback error: {1}; keeping old value.".format(pid, fr))
+            elif fr is None:
+                print("  {0}: Semantic Scholar had no match (arXiv/DOI/title); keeping old value.".format(pid))
+            else:
+                results[pid] = (fr[0], fr[1], "semantic_scholar")
+                s2_cache_put(s2_cache, p, fr)
+                print("  {0}: fallback used: Semantic Scholar".format(pid))
+
+    # ---- Merge results into the store (in dataset order) ----
+    history = []  # type: List[Dict[str, Any]]
+    for p in papers:
+        pid = p.get("id")
+        if pid not in results:
             continue
+        citations, resolved_url, source_used = results[pid]
+        checked = checked_at.get(pid, run_ts)
+        scholar_url = (p.get("scholar", {}) or {}).get("scholar_url")
+
+        old = store["papers"].get(pid, {}) or {}
+        old_citations = old.get("citations")
 
         store["papers"].setdefault(pid, {})
         store["papers"][pid].update(
             {
                 "citations": citations,
-                "last_checked_utc": run_ts,
+                "last_checked_utc": checked,
                 # scholar_url is ONLY for Google Scholar URLs (cluster/cites)
                 "scholar_url": scholar_url or (resolved_url if source_used == "google_scholar" else "") or "",
                 # keep resolved_url for debugging
@@ -315,21 +696,16 @@ def main():
         )
 
         if old_citations != citations:
-            append_jsonl(
-                HISTORY_JSONL,
+            history.append(
                 {
                     "paper_id": pid,
-                    "timestamp_utc": run_ts,
+                    "timestamp_utc": checked,
                     "citations": citations,
                     "previous": old_citations,
                     "source_used": source_used,
-                },
+                }
             )
 
-        d = choose_delay()
-        print("  Sleeping {0}s...".format(d))
-        time.sleep(d)
-
     store["meta"].update(
         {
             "last_updated_utc": run_ts,
@@ -338,7 +714,10 @@ def main():
         }
     )
 
+    append_jsonl_many(HISTORY_JSONL, history)
     write_json(CITATIONS_JSON, store)
+    write_json(SCHOLAR_CACHE_JSON, scholar_cache)
+    write_json(S2_CACHE_JSON, s2_cache)
 
     # Render README safely as module
     # os.system("python -m scripts.render_readme")
@@ -2,13 +2,25 @@
 import json
 import os
 import time
-from typing import Any, Dict
+from typing import Any, Dict, List
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 def read_json(path, default):
     # type: (str, Any) -> Any
-    if not os.path.exists(path):
+    try:
+        size = os.stat(path).st_size
+    except FileNotFoundError:
         return default
+    if size <= 2:
+        return default  # empty, "{}" or "[]": nothing worth parsing
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
@@ -20,27 +32,31 @@ def write_json(path, obj):
         os.makedirs(d, exist_ok=True)
 
     tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2, sort_keys=True)
+    if orjson is not None:
+        # same layout as json.dump(indent=2, sort_keys=True, ensure_ascii=False)
+        with open(tmp, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2, sort_keys=True)
     os.replace(tmp, path)
 
 
-def append_jsonl(path, obj):
-    # type: (str, Dict[str, Any]) -> None
+def append_jsonl_many(path, objs):
+    # type: (str, List[Dict[str, Any]]) -> None
+    """Append one JSON line per object, with a single open and write for the whole batch."""
+    if not objs:
+        return
     d = os.path.dirname(path)
     if d:
         os.makedirs(d, exist_ok=True)
 
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+    # stdlib json on purpose: history lines keep one format whether or not orjson is installed
+    data = "".join(json.dumps(obj, ensure_ascii=False) + "\n" for obj in objs).encode("utf-8")
+    with open(path, "ab") as f:
+        f.write(data)
 
 
 def now_utc_iso():
     # type: () -> str
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
-
-
-def sleep_backoff(attempt):
-    # type: (int) -> None
-    base = min(60, 2 ** attempt)
-    time.sleep(base + (attempt % 3))
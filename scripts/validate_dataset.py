@@ -4,18 +4,28 @@ from __future__ import annotations
 import argparse
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Set, Optional
+from typing import AbstractSet, Any, Dict, FrozenSet, List, Set, Optional, Tuple
 from urllib.parse import urlparse
 
 import yaml
 
+from _yaml_cache import SafeLoader
+
 ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_DATA = ROOT / "data" / "papers.yaml"
 DEFAULT_SCHEMA = ROOT / "data" / "schema.json"
 
+try:
+    import fastjsonschema  # compiles the schema to Python code, much faster than jsonschema
+except ImportError:
+    fastjsonschema = None
+
 try:
     import jsonschema
 except ImportError:
+    jsonschema = None
+
+if fastjsonschema is None and jsonschema is None:
     print("Missing dependency: jsonschema. Install with: pip install jsonschema", file=sys.stderr)
     sys.exit(2)
 
@@ -26,7 +36,7 @@ except ImportError:
 
 def load_yaml(path: Path) -> Dict[str, Any]:
     with path.open("r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=SafeLoader)
 
 
 def load_json(path: Path) -> Dict[str, Any]:
@@ -35,6 +45,30 @@ def load_json(path: Path) -> Dict[str, Any]:
         return json.load(f)
 
 
+# -------------------------
+# Schema
+# -------------------------
+
+def schema_error(data: Any, schema: Dict[str, Any]) -> Optional[Tuple[str, List[Any]]]:
+    """(message, path) of the first JSON Schema error in `data`, or None if it is valid.
+
+    fastjsonschema (when installed) does the pass/fail check; only on failure is
+    jsonschema asked for the error, so messages read the same either way.
+    """
+    if fastjsonschema is not None:
+        # jsonschema treats "format" as an annotation and never fills defaults; match it
+        try:
+            fastjsonschema.compile(schema, use_default=False, use_formats=False)(data)
+            return None
+        except fastjsonschema.JsonSchemaValueException as e:
+            if jsonschema is None:
+                return e.message, list(e.path or [])[1:]  # drop the leading "data"
+
+    validator = jsonschema.validators.validator_for(schema)(schema)
+    err = jsonschema.exceptions.best_match(validator.iter_errors(data))
+    return None if err is None else (err.message, list(err.path))
+
+
 # -------------------------
 # Helpers
 # -------------------------
@@ -69,36 +103,34 @@ def resolve_relation_target(rel: Any) -> Optional[str]:
 # Integrity checks
 # -------------------------
 
-def validate_unique_ids(papers: List[Dict[str, Any]]) -> List[str]:
+def _relation_errors(p: Dict[str, Any], ids: AbstractSet[str]) -> List[str]:
+    pid = p["id"]
+    targets = [resolve_relation_target(rel) for rel in p.get("relations", []) or []]
+    # fast path: nearly every relation resolves to another existing paper
+    bad = [tgt for tgt in targets if not tgt or tgt not in ids or tgt == pid]
+    if not bad:
+        return []
+
     errors: List[str] = []
-    seen: Set[str] = set()
-    for p in papers:
-        pid = p.get("id")
-        if pid in seen:
-            errors.append(f"Duplicate id: {pid}")
-        seen.add(pid)
+    for tgt in bad:
+        if not tgt:
+            errors.append(f"{pid}: relation missing target (expected target_id/paper_id/target)")
+            continue
+        if tgt not in ids:
+            errors.append(f"{pid}: relation target '{tgt}' does not exist")
+        if tgt == pid:
+            errors.append(f"{pid}: relation target cannot be self")
     return errors
 
 
-def validate_relations_exist(papers: List[Dict[str, Any]]) -> List[str]:
-    errors: List[str] = []
-    ids: Set[str] = {p["id"] for p in papers}
+CANONICAL_LINK_KEYS = ["doi", "journal", "proceedings", "publisher", "official", "url", "pdf"]
 
-    for p in papers:
-        rels = p.get("relations", []) or []
-        for rel in rels:
-            tgt = resolve_relation_target(rel)
-            if not tgt:
-                errors.append(f"{p['id']}: relation missing target (expected target_id/paper_id/target)")
-                continue
-            if tgt not in ids:
-                errors.append(f"{p['id']}: relation target '{tgt}' does not exist")
-            if tgt == p["id"]:
-                errors.append(f"{p['id']}: relation target cannot be self")
-    return errors
+_ARXIV_ABS_PREFIX = "https://arxiv.org/abs/"
+_ARXIV_PDF_PREFIX = "https://arxiv.org/pdf/"
+_PDF_SUFFIX = ".pdf"
 
 
-def validate_links(papers: List[Dict[str, Any]]) -> List[str]:
+def _link_errors(p: Dict[str, Any]) -> List[str]:
     """Peer-reviewed-first rules (matches the site logic).
 
     - If publication_status == canonical_preprint:
@@ -112,53 +144,76 @@ def validate_links(papers: List[Dict[str, Any]]) -> List[str]:
         * if links.pdf is provided, it must NOT be an arXiv PDF URL
     """
     errors: List[str] = []
+    links = p.get("links", {}) or {}
 
-    canonical_keys = ["doi", "journal", "proceedings", "publisher", "official", "url", "pdf"]
-
-    for p in papers:
-        links = p.get("links", {}) or {}
-
-        arxiv = links.get("arxiv")
-        pdf = links.get("pdf")
-
-        if is_canonical_preprint(p):
-            if not (isinstance(arxiv, str) and arxiv.startswith("https://arxiv.org/abs/")):
-                errors.append(
-                    f"{p['id']}: canonical_preprint requires links.arxiv starting with 'https://arxiv.org/abs/'"
-                )
-            if not (isinstance(pdf, str) and pdf.startswith("https://arxiv.org/pdf/") and pdf.endswith(".pdf")):
-                errors.append(f"{p['id']}: canonical_preprint requires links.pdf as an arXiv PDF URL ending in .pdf")
-            continue
+    arxiv = links.get("arxiv")
+    pdf = links.get("pdf")
 
-        # Non-preprint: require some canonical peer-reviewed link (non-arXiv)
-        found_canonical = False
-        for k in canonical_keys:
-            v = links.get(k)
-            if not is_url(v):
-                continue
-            if isinstance(v, str) and "arxiv.org" in v:
-                continue
-            found_canonical = True
-            break
-
-        if not found_canonical:
+    if is_canonical_preprint(p):
+        if not (isinstance(arxiv, str) and arxiv.startswith(_ARXIV_ABS_PREFIX)):
             errors.append(
-                f"{p['id']}: missing canonical peer-reviewed link (add one of: doi/journal/proceedings/publisher/official/url/pdf)"
+                f"{p['id']}: canonical_preprint requires links.arxiv starting with 'https://arxiv.org/abs/'"
             )
+        if not (isinstance(pdf, str) and pdf.startswith(_ARXIV_PDF_PREFIX) and pdf.endswith(_PDF_SUFFIX)):
+            errors.append(f"{p['id']}: canonical_preprint requires links.pdf as an arXiv PDF URL ending in .pdf")
+        return errors
+
+    # Non-preprint: require some canonical peer-reviewed link (non-arXiv)
+    found_canonical = False
+    for k in CANONICAL_LINK_KEYS:
+        v = links.get(k)
+        if not is_url(v):
+            continue
+        if "arxiv.org" in v:  # is_url() already guarantees a str; any arXiv mirror counts
+            continue
+        found_canonical = True
+        break
+
+    if not found_canonical:
+        errors.append(
+            f"{p['id']}: missing canonical peer-reviewed link (add one of: doi/journal/proceedings/publisher/official/url/pdf)"
+        )
+
+    # If pdf exists, make sure it's not an arXiv PDF for non-preprints
+    if isinstance(pdf, str) and pdf.strip():
+        if "arxiv.org/pdf/" in pdf:
+            errors.append(f"{p['id']}: links.pdf must NOT be an arXiv PDF for peer-reviewed entries")
+        elif not is_url(pdf):
+            errors.append(f"{p['id']}: links.pdf must be a valid URL")
+
+    # If arxiv exists, it can be kept as provenance, but validate format if provided
+    if isinstance(arxiv, str) and arxiv.strip():
+        if not arxiv.startswith(_ARXIV_ABS_PREFIX):
+            errors.append(f"{p['id']}: links.arxiv must start with 'https://arxiv.org/abs/' (if provided)")
 
-        # If pdf exists, make sure it's not an arXiv PDF for non-preprints
-        if isinstance(pdf, str) and pdf.strip():
-            if "arxiv.org/pdf/" in pdf:
-                errors.append(f"{p['id']}: links.pdf must NOT be an arXiv PDF for peer-reviewed entries")
-            elif not is_url(pdf):
-                errors.append(f"{p['id']}: links.pdf must be a valid URL")
+    return errors
 
-        # If arxiv exists, it can be kept as provenance, but validate format if provided
-        if isinstance(arxiv, str) and arxiv.strip():
-            if not arxiv.startswith("https://arxiv.org/abs/"):
-                errors.append(f"{p['id']}: links.arxiv must start with 'https://arxiv.org/abs/' (if provided)")
 
-    return errors
+def validate_all(papers: List[Dict[str, Any]]) -> List[str]:
+    """Dataset integrity checks (unique ids, relation targets, links) in one pass.
+
+    Relations can point forward, so they are checked once every id has been seen
+    (only papers that actually have relations are revisited). Errors are grouped:
+    duplicate ids, then relations, then links.
+    """
+    dup_errors: List[str] = []
+    link_errors: List[str] = []
+    seen: Set[str] = set()
+    with_relations: List[Dict[str, Any]] = []
+
+    for p in papers:
+        pid = p.get("id")
+        if pid in seen:
+            dup_errors.append(f"Duplicate id: {pid}")
+        seen.add(pid)
+        if p.get("relations"):
+            with_relations.append(p)
+        link_errors += _link_errors(p)
+
+    ids: FrozenSet[str] = frozenset(seen)
+    rel_errors = [err for p in with_relations for err in _relation_errors(p, ids)]
+
+    return dup_errors + rel_errors + link_errors
 
 
 # -------------------------
@@ -178,22 +233,19 @@ def main() -> int:
     schema = load_json(schema_path)
 
     # 1) JSON Schema validation
-    try:
-        jsonschema.validate(instance=data, schema=schema)
-    except jsonschema.ValidationError as e:
+    err = schema_error(data, schema)
+    if err is not None:
+        message, err_path = err
         print("Schema validation failed:", file=sys.stderr)
-        print(f"- {e.message}", file=sys.stderr)
-        if e.path:
-            print(f"  at path: {'/'.join(map(str, e.path))}", file=sys.stderr)
+        print(f"- {message}", file=sys.stderr)
+        if err_path:
+            print(f"  at path: {'/'.join(map(str, err_path))}", file=sys.stderr)
         return 1
 
     papers: List[Dict[str, Any]] = data["papers"]
 
     # 2) Dataset integrity checks
-    errors: List[str] = []
-    errors += validate_unique_ids(papers)
-    errors += validate_relations_exist(papers)
-    errors += validate_links(papers)
+    errors = validate_all(papers)
 
     if errors:
         print("Dataset validation failed:", file=sys.stderr)
@@ -7,6 +7,8 @@ from typing import Any, Dict, List, Tuple
 
 import yaml
 
+from _yaml_cache import SafeLoader
+
 
 # ---- Config (tweak as desired) ----
 
@@ -64,28 +66,25 @@ def has_any_link_key(p: Dict[str, Any], keys: List[str]) -> bool:
     return False
 
 
-def looks_like_arxiv_url(u: str) -> bool:
-    s = u.lower()
-    return "arxiv.org" in s
+def lowered_links(p: Dict[str, Any]) -> Dict[str, str]:
+    """Non-empty string links, lower-cased once per paper."""
+    return {k: v.lower() for k, v in get_links(p).items() if is_nonempty_str(v)}
 
 
-def canonical_peer_reviewed_link_ok(p: Dict[str, Any]) -> Tuple[bool, str]:
+def canonical_peer_reviewed_link_ok(p: Dict[str, Any], links_lc: Dict[str, str] | None = None) -> Tuple[bool, str]:
     """
     For peer-reviewed papers, canonical links must exist and must not be arXiv.
     Specifically: at least one of PEER_REVIEWED_LINK_KEYS exists with a non-arXiv URL.
     """
-    links = get_links(p)
-    for k in PEER_REVIEWED_LINK_KEYS:
-        v = links.get(k)
-        if not is_nonempty_str(v):
-            continue
-        if looks_like_arxiv_url(v):
-            continue
+    if links_lc is None:
+        links_lc = lowered_links(p)
+    k = next((k for k in PEER_REVIEWED_LINK_KEYS if k in links_lc and "arxiv.org" not in links_lc[k]), None)
+    if k is not None:
         return True, f"ok ({k})"
     return False, "missing peer-reviewed canonical link (non-arXiv)"
 
 
-def canonical_preprint_requirements_ok(p: Dict[str, Any]) -> Tuple[bool, str]:
+def canonical_preprint_requirements_ok(p: Dict[str, Any], links_lc: Dict[str, str] | None = None) -> Tuple[bool, str]:
     """
     Canonical preprint entries are allowed, but must be clearly justified and usable.
     Require:
@@ -106,14 +105,9 @@ def canonical_preprint_requirements_ok(p: Dict[str, Any]) -> Tuple[bool, str]:
     if not scholar_url:
         return False, "canonical_preprint requires scholar.scholar_url (or scholar_url)"
 
-    links = get_links(p)
-    arxiv_like = False
-    for k in ["arxiv", "pdf", "url"]:
-        v = links.get(k)
-        if is_nonempty_str(v) and looks_like_arxiv_url(v):
-            arxiv_like = True
-            break
-    if not arxiv_like:
+    if links_lc is None:
+        links_lc = lowered_links(p)
+    if not any("arxiv.org" in links_lc.get(k, "") for k in ("arxiv", "pdf", "url")):
         return False, "canonical_preprint should include an arXiv link (links.arxiv or links.pdf)"
 
     return True, "ok"
@@ -165,17 +159,16 @@ def validate_paper(p: Dict[str, Any], ids_seen: set) -> List[str]:
     # Publication status logic
     ps = infer_publication_status(p)
 
-    # If peer-reviewed (accepted/published), require non-arXiv canonical link
-    if ps in ["accepted", "published", "peer_reviewed"]:
-        ok, msg = canonical_peer_reviewed_link_ok(p)
-        if not ok:
-            errs.append(msg)
-
-    # If canonical preprint, require editorial note + scholar URL + arXiv link
-    if ps in ["canonical_preprint"]:
-        ok, msg = canonical_preprint_requirements_ok(p)
-        if not ok:
-            errs.append(msg)
+    # If peer-reviewed (accepted/published), require non-arXiv canonical link;
+    # if canonical preprint, require editorial note + scholar URL + arXiv link
+    if ps in ("accepted", "published", "peer_reviewed"):
+        ok, msg = canonical_peer_reviewed_link_ok(p, lowered_links(p))
+    elif ps == "canonical_preprint":
+        ok, msg = canonical_preprint_requirements_ok(p, lowered_links(p))
+    else:
+        ok, msg = True, ""
+    if not ok:
+        errs.append(msg)
 
     # Optional: if venue is arXiv but status not canonical_preprint, nudge
     venue = str(p.get("venue") or "").strip().lower()
@@ -185,18 +178,20 @@ def validate_paper(p: Dict[str, Any], ids_seen: set) -> List[str]:
     return errs
 
 
-def main() -> int:
-    # Default path matches your repo layout (scripts/validate_papers.py)
-    papers_path = Path(__file__).resolve().parent.parent / "data" / "papers.yaml"
-    if len(sys.argv) > 1:
-        papers_path = Path(sys.argv[1])
+def main(data: Dict[str, Any] | None = None) -> int:
+    """Validate papers.yaml, or an already-parsed `data` dict (e.g. from build_dataset)."""
+    if data is None:
+        # Default path matches your repo layout (scripts/validate_papers.py)
+        papers_path = Path(__file__).resolve().parent.parent / "data" / "papers.yaml"
+        if len(sys.argv) > 1:
+            papers_path = Path(sys.argv[1])
 
-    if not papers_path.exists():
-        print(f"[validate] ERROR: file not found: {papers_path}", file=sys.stderr)
-        return 2
+        if not papers_path.exists():
+            print(f"[validate] ERROR: file not found: {papers_path}", file=sys.stderr)
+            return 2
 
-    with papers_path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f) or {}
+        with papers_path.open("r", encoding="utf-8") as f:
+            data = yaml.load(f, Loader=SafeLoader) or {}
 
     papers = data.get("papers")
     if not isinstance(papers, list):
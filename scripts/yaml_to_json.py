@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Diffusion Lighthouse — yaml_to_json.py
+Write data/papers.json, a JSON mirror of data/papers.yaml.
+
+papers.yaml stays the source of truth (it carries the editorial comments);
+the mirror only exists so the build scripts can skip YAML parsing. It records
+the (st_mtime_ns, st_size) of the papers.yaml it was converted from, and
+scripts fall back to papers.yaml whenever the mirror is missing or that no
+longer matches.
+
+Usage:
+  python scripts/yaml_to_json.py
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from _yaml_cache import load_cached, mirror_path, source_key
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ROOT = Path(__file__).resolve().parent.parent
+PAPERS_YAML = ROOT / "data" / "papers.yaml"
+PAPERS_JSON = Path(mirror_path(PAPERS_YAML))
+
+
+def main() -> None:
+    key = source_key(PAPERS_YAML)
+    data = load_cached(PAPERS_YAML) or {}
+    mirror = {"source": key, "payload": data}
+
+    tmp = PAPERS_JSON.with_suffix(".json.tmp")
+    if orjson is not None:
+        tmp.write_bytes(orjson.dumps(mirror, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(mirror, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, PAPERS_JSON)
+
+    print(f"Wrote {PAPERS_JSON} ({len(data.get('papers') or [])} papers)")
+
+
+if __name__ == "__main__":
+    main()